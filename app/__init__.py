@@ -8,6 +8,7 @@ from flask import Flask
 
 from app.api.api_routes import api_bp
 from app.core.config_manager import Config
+from app.core.json_provider import OrjsonProvider
 from app.core.myjd_client import MyJDClient
 
 __version__ = '1.0.0'
@@ -16,18 +17,25 @@ __version__ = '1.0.0'
 def create_app(config: Config):
     """Application factory function."""
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
 
     # Load configuration
     try:
         secret = config.secret_key if config.secret_key else secrets.token_urlsafe(32)
         app.config['SECRET_KEY'] = secret
-        app.config['JSON_SORT_KEYS'] = False
 
         # Initialize MyJD client
         myjd_client = MyJDClient(config)
         app.myjd_client = myjd_client
         app.my_config = config
 
+        # Reverse lookup table: category alias -> configured category
+        category_alias_map = {}
+        for key, aliases in config.mapping_categories.items():
+            for alias in aliases:
+                category_alias_map.setdefault(alias.lower(), key)
+        app.category_alias_map = category_alias_map
+
         # Register blueprints
         app.register_blueprint(api_bp, url_prefix='/api')
 
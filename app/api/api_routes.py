@@ -1,7 +1,10 @@
 import logging
+from functools import wraps
 from logging import Logger
 
-from flask import Blueprint, request, jsonify, current_app
+import msgpack
+import orjson
+from flask import Blueprint, Response, request, jsonify, current_app, g
 import re
 from app.models.download_models import DownloadRequest
 from app.utils.exceptions import (
@@ -12,9 +15,94 @@ from app.utils.exceptions import (
 
 api_bp = Blueprint('api', __name__)
 
+# match case-insensitive 'Stagione' seguito da separatori opzionali e da un numero
+_STAGIONE_RE = re.compile(r'\bStagione[\s\-_:]*([0-9]+)\b', re.IGNORECASE)
+_stagione_sub = _STAGIONE_RE.sub
+
+_JSON_MIMETYPE = 'application/json'
+_MSGPACK_MIMETYPE = 'application/msgpack'
+_SUPPORTED_MIMETYPES = [_JSON_MIMETYPE, _MSGPACK_MIMETYPE]
+
 def get_myjd_client():
-    """Get MyJDownloader client from Flask app."""
-    return current_app.myjd_client
+    """Get MyJDownloader client from Flask app, cached for the current request."""
+    client = getattr(g, '_myjd_client', None)
+    if client is None:
+        client = g._myjd_client = current_app.myjd_client
+    return client
+
+
+def make_json_response(data, status: int = 200) -> Response:
+    """Serialize data to a JSON response through the app's JSON provider."""
+    resp = current_app.json.response(data)
+    resp.status_code = status
+    return resp
+
+
+def wants_msgpack() -> bool:
+    """Check whether the client prefers MessagePack over JSON."""
+    return request.accept_mimetypes.best_match(_SUPPORTED_MIMETYPES) == _MSGPACK_MIMETYPE
+
+
+def serialize_response(data, status: int = 200) -> Response:
+    """Serialize data as MessagePack or JSON according to the Accept header."""
+    if wants_msgpack():
+        resp = Response(msgpack.packb(data), status=status, mimetype=_MSGPACK_MIMETYPE)
+    else:
+        resp = make_json_response(data, status)
+    # The body depends on Accept, so caches must key on it
+    resp.vary.add('Accept')
+    return resp
+
+
+def _stream_packages(packages: list, option: int, default):
+    """Yield a successful package list response one encoded package at a time."""
+    dumps = orjson.dumps
+    yield b'{"success":true,"count":%d,"packages":[' % len(packages)
+    for i, package in enumerate(packages):
+        if i:
+            yield b','
+        yield dumps(package, option=option, default=default)
+    yield b']}\n'
+
+
+# exception -> (status code, error code, log level, log label)
+_ERROR_MAP = {
+    ValidationError: (400, 'validation_error', logging.WARNING, 'Validation error'),
+    MyJDConnectionError: (503, 'connection_error', logging.ERROR, 'Connection error'),
+    MyJDOperationError: (400, 'operation_error', logging.ERROR, 'Operation error'),
+}
+_HANDLED_ERRORS = tuple(_ERROR_MAP)
+
+
+def _error_response(e: Exception, view_name: str) -> Response:
+    """Build the standard JSON error response for an exception raised by a view."""
+    if isinstance(e, _HANDLED_ERRORS):
+        status, error, level, label = next(
+            _ERROR_MAP[cls] for cls in type(e).__mro__ if cls in _ERROR_MAP
+        )
+        current_app.logger.log(level, f"{label}: {str(e)}")
+        return make_json_response({
+            'success': False,
+            'error': error,
+            'message': str(e)
+        }, status)
+    current_app.logger.error(f"Unexpected error in {view_name}: {str(e)}")
+    return make_json_response({
+        'success': False,
+        'error': 'internal_error',
+        'message': 'Internal server error'
+    }, 500)
+
+
+def api_error_handler(view):
+    """Map exceptions raised by a view to the standard JSON error response."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            return view(*args, **kwargs)
+        except Exception as e:
+            return _error_response(e, view.__name__)
+    return wrapper
 
 
 @api_bp.route('/health', methods=['GET'])
@@ -40,364 +128,240 @@ def health_check():
 
 
 @api_bp.route('/connect', methods=['POST'])
+@api_error_handler
 def connect():
     """Connect to MyJDownloader service."""
-    try:
-        client = get_myjd_client()
-        
-        if client.is_connected():
-            return jsonify({
-                'success': True,
-                'message': 'Already connected to MyJDownloader'
-            }), 200
-        
-        client.connect()
-        
+    client = get_myjd_client()
+
+    if client.is_connected():
         return jsonify({
             'success': True,
-            'message': 'Successfully connected to MyJDownloader'
+            'message': 'Already connected to MyJDownloader'
         }), 200
-        
-    except MyJDConnectionError as e:
-        current_app.logger.error(f"Connection error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'connection_error',
-            'message': str(e)
-        }), 400
-        
-    except Exception as e:
-        current_app.logger.error(f"Unexpected error during connection: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'internal_error',
-            'message': 'Internal server error'
-        }), 500
+
+    client.connect()
+
+    return jsonify({
+        'success': True,
+        'message': 'Successfully connected to MyJDownloader'
+    }), 200
 
 
 @api_bp.route('/disconnect', methods=['POST'])
+@api_error_handler
 def disconnect():
     """Disconnect from MyJDownloader service."""
-    try:
-        client = get_myjd_client()
-        client.disconnect()
-        
-        return jsonify({
-            'success': True,
-            'message': 'Disconnected from MyJDownloader'
-        }), 200
-        
-    except Exception as e:
-        current_app.logger.error(f"Error during disconnection: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'internal_error',
-            'message': str(e)
-        }), 500
+    client = get_myjd_client()
+    client.disconnect()
+
+    return jsonify({
+        'success': True,
+        'message': 'Disconnected from MyJDownloader'
+    }), 200
+
+
+def _season_repl(m: re.Match) -> str:
+    return 'S' + m.group(1).zfill(2)
 
 
 def clean_name(name: str) -> str:
     """Clean and standardize the download package name."""
     # TODO: utilizzare un json/toml di config per definire le sostituzioni
-    def _repl(m):
-        num = m.group(1)
-        return 'S' + num.zfill(2)
-    # match case-insensitive 'Stagione' seguito da separatori opzionali e da un numero
-    name = re.sub(r'(?i)\bStagione[\s\-_:]*([0-9]+)\b', _repl, name)
-    return name
+    # Most names never mention a season: skip the regex engine entirely
+    if 'stagione' not in name.casefold():
+        return name
+    return _stagione_sub(_season_repl, name)
 
 @api_bp.route('/downloads', methods=['POST'])
+@api_error_handler
 def add_download():
     """Add a new download package."""
-    try:
-        data = request.get_json()
-        
-        if not data:
-            raise ValidationError("No JSON data provided")
-        
-        # Extract request data
-        name = data.get('name', 'Unnamed Package')
-        links = data.get('links', [])
-        category = data.get('category', 'other')
-        auto_start = data.get('auto_start', True)
-        # NON appare il print
-        current_app.logger.debug(f"Aggiungo: {name}: {len(links)} link. Categoria: {category}. {'Autostart' if auto_start else 'No autostart'}")
-        # Create and validate download request
-        category = extract_correct_category(category)
-        name = clean_name(name)
-        download_request = DownloadRequest(name=name, links=links, category=category, auto_start=auto_start)
-        client = get_myjd_client()
+    data = request.get_json()
 
-        valid_request = download_request.validate(
-            client.config.allowed_categories,
-        )
-        if not valid_request:
-            raise ValidationError("Invalid download request data")
-        
-        # Add download package
-        success = client.add_download_package(
-            name=download_request.name,
-            download_links=download_request.links,
-            category=download_request.category,
-            auto_start=download_request.auto_start
-        )
-        
-        return jsonify({
-            'success': success,
-            'message': f'Successfully added download package: {name}',
-            'package_name': name,
-            'links_count': len(links),
-            'category': category
-        }), 201
-        
-    except ValidationError as e:
-        current_app.logger.warning(f"Validation error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'validation_error',
-            'message': str(e)
-        }), 400
-        
-    except MyJDConnectionError as e:
-        current_app.logger.error(f"Connection error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'connection_error',
-            'message': str(e)
-        }), 503
-        
-    except MyJDOperationError as e:
-        current_app.logger.error(f"Operation error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'operation_error',
-            'message': str(e)
-        }), 400
-        
-    except Exception as e:
-        current_app.logger.error(f"Unexpected error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'internal_error',
-            'message': 'Internal server error'
-        }), 500
+    if not data:
+        raise ValidationError("No JSON data provided")
+
+    # Extract request data
+    name = data.get('name', 'Unnamed Package')
+    links = data.get('links', [])
+    category = data.get('category', 'other')
+    auto_start = data.get('auto_start', True)
+    logger = current_app.logger
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Aggiungo: %s: %d link. Categoria: %s. %s", name, len(links), category,
+                     'Autostart' if auto_start else 'No autostart')
+    # Create and validate download request
+    category = extract_correct_category(category)
+    name = clean_name(name)
+    download_request = DownloadRequest(name=name, links=links, category=category, auto_start=auto_start)
+    client = get_myjd_client()
+
+    valid_request = download_request.validate(
+        client.config.allowed_categories,
+    )
+    if not valid_request:
+        raise ValidationError("Invalid download request data")
+
+    # Add download package
+    success = client.add_download_package(
+        name=download_request.name,
+        download_links=download_request.links,
+        category=download_request.category,
+        auto_start=download_request.auto_start
+    )
+
+    return make_json_response({
+        'success': success,
+        'message': f'Successfully added download package: {name}',
+        'package_name': name,
+        'links_count': len(links),
+        'category': category
+    }, 201)
 
 
 def extract_correct_category(category: str) -> str:
-    client = get_myjd_client()
-    category_map = client.config.mapping_categories
-    for key, mapped_categories in category_map.items():
-        if category.lower() in mapped_categories:
-            current_app.logger.info(f"Trovato {category} in {mapped_categories} --> {key}")
-            category = key
-            break
-    return category
+    key = current_app.category_alias_map.get(category.lower())
+    if key is None:
+        return category
+    current_app.logger.info(f"Trovato {category} --> {key}")
+    return key
 
 
 @api_bp.route('/downloads', methods=['GET'])
+@api_error_handler
 def get_downloads():
     """Get all download packages with their status."""
-    try:
-        client = get_myjd_client()
-        packages = client.get_download_packages()
-        
-        # Convert packages to dictionaries
-        packages_data = [pkg.to_dict() for pkg in packages]
-        
-        return jsonify({
-            'success': True,
-            'count': len(packages_data),
-            'packages': packages_data
-        }), 200
-        
-    except MyJDConnectionError as e:
-        current_app.logger.error(f"Connection error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'connection_error',
-            'message': str(e)
-        }), 503
-        
-    except MyJDOperationError as e:
-        current_app.logger.error(f"Operation error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'operation_error',
-            'message': str(e)
-        }), 400
-        
-    except Exception as e:
-        current_app.logger.error(f"Unexpected error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'internal_error',
-            'message': 'Internal server error'
-        }), 500
+    client = get_myjd_client()
+    packages = client.get_download_packages()
+
+    # Convert packages to dictionaries
+    packages_data = [pkg.to_dict() for pkg in packages]
+
+    return serialize_response({
+        'success': True,
+        'count': len(packages_data),
+        'packages': packages_data
+    }, 200)
 
 
 @api_bp.route('/downloads/start', methods=['POST'])
+@api_error_handler
 def start_downloads():
     """Start downloads."""
-    try:
-        data = request.get_json() or {}
-        package_ids = data.get('package_ids', [])
-        
-        client = get_myjd_client()
-        success = client.start_downloads(package_ids)
-        
-        message = "Started all downloads" if not package_ids else f"Started {len(package_ids)} packages"
-        
-        return jsonify({
-            'success': success,
-            'message': message
-        }), 200
-        
-    except MyJDConnectionError as e:
-        current_app.logger.error(f"Connection error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'connection_error',
-            'message': str(e)
-        }), 503
-        
-    except MyJDOperationError as e:
-        current_app.logger.error(f"Operation error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'operation_error',
-            'message': str(e)
-        }), 400
-        
-    except Exception as e:
-        current_app.logger.error(f"Unexpected error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'internal_error',
-            'message': 'Internal server error'
-        }), 500
+    data = request.get_json() or {}
+    package_ids = data.get('package_ids', [])
+
+    client = get_myjd_client()
+    success = client.start_downloads(package_ids)
+
+    message = "Started all downloads" if not package_ids else f"Started {len(package_ids)} packages"
+
+    return jsonify({
+        'success': success,
+        'message': message
+    }), 200
 
 
 @api_bp.route('/downloads/pause', methods=['POST'])
+@api_error_handler
 def pause_downloads():
     """Pause downloads."""
-    try:
-        data = request.get_json() or {}
-        package_ids = data.get('package_ids', [])
-        
-        client = get_myjd_client()
-        success = client.pause_downloads(package_ids)
-        
-        message = "Paused all downloads" if not package_ids else f"Paused {len(package_ids)} packages"
-        
-        return jsonify({
-            'success': success,
-            'message': message
-        }), 200
-        
-    except MyJDConnectionError as e:
-        current_app.logger.error(f"Connection error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'connection_error',
-            'message': str(e)
-        }), 503
-        
-    except MyJDOperationError as e:
-        current_app.logger.error(f"Operation error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'operation_error',
-            'message': str(e)
-        }), 400
-        
-    except Exception as e:
-        current_app.logger.error(f"Unexpected error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'internal_error',
-            'message': 'Internal server error'
-        }), 500
+    data = request.get_json() or {}
+    package_ids = data.get('package_ids', [])
+
+    client = get_myjd_client()
+    success = client.pause_downloads(package_ids)
+
+    message = "Paused all downloads" if not package_ids else f"Paused {len(package_ids)} packages"
+
+    return jsonify({
+        'success': success,
+        'message': message
+    }), 200
 
 
 @api_bp.route('/linkgrabber', methods=['GET'])
+@api_error_handler
 def get_linkgrabber():
     """Get packages in linkgrabber (pending downloads)."""
-    try:
-        client = get_myjd_client()
-        packages = client.get_linkgrabber_packages()
-        
-        return jsonify({
+    client = get_myjd_client()
+    packages = client.get_linkgrabber_packages()
+
+    if wants_msgpack():
+        return serialize_response({
             'success': True,
             'count': len(packages),
             'packages': packages
-        }), 200
-        
-    except MyJDConnectionError as e:
-        current_app.logger.error(f"Connection error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'connection_error',
-            'message': str(e)
-        }), 503
-        
-    except MyJDOperationError as e:
-        current_app.logger.error(f"Operation error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'operation_error',
-            'message': str(e)
-        }), 400
-        
-    except Exception as e:
-        current_app.logger.error(f"Unexpected error: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'internal_error',
-            'message': 'Internal server error'
-        }), 500
+        }, 200)
+    # The generator runs after the app context is gone, so pass the provider settings in
+    provider = current_app.json
+    resp = Response(_stream_packages(packages, provider.option, provider.default),
+                    status=200, mimetype=_JSON_MIMETYPE)
+    resp.vary.add('Accept')
+    return resp
+
+
+@api_bp.route('/overview', methods=['GET'])
+@api_error_handler
+def get_overview():
+    """Get download and linkgrabber packages in a single response."""
+    client = get_myjd_client()
+    packages = client.get_download_packages()
+    linkgrabber_packages = client.get_linkgrabber_packages()
+
+    packages_data = [pkg.to_dict() for pkg in packages]
+
+    return serialize_response({
+        'success': True,
+        'downloads': {
+            'count': len(packages_data),
+            'packages': packages_data
+        },
+        'linkgrabber': {
+            'count': len(linkgrabber_packages),
+            'packages': linkgrabber_packages
+        }
+    }, 200)
 
 
 @api_bp.route('/config', methods=['GET'])
+@api_error_handler
 def get_config_info():
     """Get configuration information (without sensitive data)."""
-    try:
-        client = get_myjd_client()
-        config = client.config
-        
-        return jsonify({
-            'success': True,
-            'config': {
-                'base_path': config.base_path,
-                'allowed_categories': config.allowed_categories,
-                'device_id': config.myjd_deviceid,
-                'username': config.myjd_username  # You might want to mask this
-            }
-        }), 200
-        
-    except Exception as e:
-        current_app.logger.error(f"Error getting config info: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': 'internal_error',
-            'message': 'Internal server error'
-        }), 500
+    client = get_myjd_client()
+    config = client.config
+
+    return jsonify({
+        'success': True,
+        'config': {
+            'base_path': config.base_path,
+            'allowed_categories': sorted(config.allowed_categories),
+            'device_id': config.myjd_deviceid,
+            'username': config.myjd_username  # You might want to mask this
+        }
+    }), 200
 
 
-@api_bp.errorhandler(404)
+# Error bodies never change, so encode them once at import
+_NOT_FOUND_BODY = orjson.dumps({
+    'success': False,
+    'error': 'not_found',
+    'message': 'Endpoint not found'
+})
+_METHOD_NOT_ALLOWED_BODY = orjson.dumps({
+    'success': False,
+    'error': 'method_not_allowed',
+    'message': 'Method not allowed'
+})
+
+
+@api_bp.app_errorhandler(404)
 def not_found(error):
     """Handle 404 errors."""
-    return jsonify({
-        'success': False,
-        'error': 'not_found',
-        'message': 'Endpoint not found'
-    }), 404
+    return Response(_NOT_FOUND_BODY, status=404, mimetype=_JSON_MIMETYPE)
 
 
-@api_bp.errorhandler(405)
+@api_bp.app_errorhandler(405)
 def method_not_allowed(error):
     """Handle 405 errors."""
-    return jsonify({
-        'success': False,
-        'error': 'method_not_allowed',
-        'message': 'Method not allowed'
-    }), 405
+    return Response(_METHOD_NOT_ALLOWED_BODY, status=405, mimetype=_JSON_MIMETYPE)
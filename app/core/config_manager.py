@@ -1,10 +1,17 @@
 import os
 import tomllib
-from typing import List
+from typing import FrozenSet, Optional
 
 
 class Config:
     """Configuration manager for the MyJDownloader API application."""
+
+    __slots__ = (
+        'config_file', '_config_data',
+        'myjd_username', 'myjd_password', 'myjd_appkey', 'myjd_deviceid',
+        'base_path', 'allowed_categories', 'mapping_categories',
+        'secret_key', 'logs_path', 'server_threads',
+    )
     
     def __init__(self, config_file: str = "config/config.toml"):
         self.config_file = config_file
@@ -18,64 +25,48 @@ class Config:
                 raise FileNotFoundError(f"Configuration file not found: {self.config_file}")
             
             with open(self.config_file, 'rb') as f:
-                self._config_data = tomllib.load(f)
+                raw_config = f.read()
+            self._config_data = tomllib.loads(raw_config.decode())
                 
         except Exception as e:
             raise RuntimeError(f"Failed to load configuration: {str(e)}")
-    
-    @property
-    def myjd_username(self) -> str:
-        """Get MyJDownloader username."""
-        return self._config_data.get('MyJD', {}).get('username', '')
-    
-    @property
-    def myjd_password(self) -> str:
-        """Get MyJDownloader password."""
-        return self._config_data.get('MyJD', {}).get('password', '')
-    
-    @property
-    def myjd_appkey(self) -> str:
-        """Get MyJDownloader app key."""
-        return self._config_data.get('MyJD', {}).get('appkey', '')
-    
-    @property
-    def myjd_deviceid(self) -> str:
-        """Get MyJDownloader device ID."""
-        return self._config_data.get('MyJD', {}).get('deviceid', '')
-    
-    @property
-    def base_path(self) -> str:
-        """Get base download path."""
-        return self._config_data.get('Downloads', {}).get('base_path', '/downloads')
-    
-    @property
-    def allowed_categories(self) -> List[str]:
-        """Get allowed download categories."""
-        return self._config_data.get('Downloads', {}).get('allowed_categories', ['other'])
 
-    @property
-    def secret_key(self) -> str:
-        """Get secret key for Flask application."""
-        return self._config_data.get('App', {}).get('secret_key')
+        self._apply_settings()
+
+    def _apply_settings(self):
+        """Resolve configuration values once into plain attributes."""
+        myjd = self._config_data.get('MyJD', {})
+        downloads = self._config_data.get('Downloads', {})
+        app = self._config_data.get('App', {})
 
-    @property
-    def logs_path(self) -> str:
-        """Get logs path."""
-        return self._config_data.get('App', {}).get('logs_path', '/logs')
+        # MyJDownloader credentials
+        self.myjd_username: str = myjd.get('username', '')
+        self.myjd_password: str = myjd.get('password', '')
+        self.myjd_appkey: str = myjd.get('appkey', '')
+        self.myjd_deviceid: str = myjd.get('deviceid', '')
 
-    @property
-    def mapping_categories(self) -> dict:
-        """Get category mappings."""
-        return self._config_data.get('Downloads', {}).get('mapping_categories', {})
+        # Downloads settings
+        self.base_path: str = downloads.get('base_path', '/downloads')
+        self.allowed_categories: FrozenSet[str] = frozenset(downloads.get('allowed_categories', ['other']))
+        self.mapping_categories: dict = downloads.get('mapping_categories', {})
+
+        # Application settings
+        self.secret_key: Optional[str] = app.get('secret_key')
+        self.logs_path: str = app.get('logs_path', '/logs')
+        # MyJD calls are serialized per client: extra threads only serve cached or non-MyJD requests
+        try:
+            self.server_threads: int = int(app.get('server_threads', 16))
+        except (TypeError, ValueError):
+            raise RuntimeError(f"Invalid server_threads value: {app.get('server_threads')!r}")
+        if self.server_threads < 1:
+            raise RuntimeError(f"server_threads must be at least 1, got {self.server_threads}")
     
     def validate(self) -> bool:
         """Validate configuration completeness."""
-        required_fields = [
-            self.myjd_username,
-            self.myjd_password,
-            self.myjd_appkey,
-            self.myjd_deviceid,
-            self.base_path
-        ]
-        
-        return all(field.strip() for field in required_fields if isinstance(field, str))
+        return bool(
+            self.myjd_username.strip()
+            and self.myjd_password.strip()
+            and self.myjd_appkey.strip()
+            and self.myjd_deviceid.strip()
+            and self.base_path.strip()
+        )
@@ -0,0 +1,23 @@
+import orjson
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson for faster response serialization."""
+
+    option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs) -> str:
+        """Serialize data as JSON using orjson."""
+        return orjson.dumps(obj, option=self.option, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        """Deserialize JSON data using orjson."""
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        """Build a JSON response from orjson bytes, skipping the str round-trip."""
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, option=self.option | orjson.OPT_APPEND_NEWLINE, default=self.default)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -1,65 +1,175 @@
 import os
 import logging
+import threading
+import time
+from functools import wraps
 from typing import List, Dict, Optional
+import myjdapi.myjdapi as myjdapi_module
+import requests
 from myjdapi import Myjdapi
 from myjdapi.exception import MYJDTokenInvalidException
+from requests.adapters import HTTPAdapter
 
 from app.core.config_manager import Config
 from app.models.download_models import DownloadPackage, DownloadStatus
 from app.utils.exceptions import MyJDConnectionError, MyJDOperationError
 
+logger = logging.getLogger(__name__)
+
+
+class _SessionTransport:
+    """
+    Drop-in for the requests module used inside myjdapi.
+    
+    myjdapi calls requests.get/requests.post directly, opening a new TCP/TLS
+    connection per call; routing them through a pooled Session keeps
+    connections to the MyJD servers alive between calls.
+    """
+    exceptions = requests.exceptions
+
+    def __init__(self, pool_size: int = 32):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.get = self.session.get
+        self.post = self.session.post
+
+
+# Deliberate process-wide patch, done once at import: every Myjdapi instance
+# in the process shares this pooled transport instead of bare requests calls
+myjdapi_module.requests = _SessionTransport()
+
+
+def _with_token_refresh(fn):
+    """Retry a MyJD call once after refreshing an expired token."""
+    operation = fn.__name__.lstrip('_')
+    
+    @wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        generation = self._refresh_generation
+        try:
+            with self._api_lock:
+                return fn(self, *args, **kwargs)
+        except MYJDTokenInvalidException as e:
+            logger.warning("Token invalid error detected in %s: %s", operation, e)
+            if not self._refresh_connection(generation):
+                raise MyJDOperationError("Failed to refresh connection after token expiration")
+        
+        logger.info("Retrying %s after token refresh...", operation)
+        try:
+            with self._api_lock:
+                return fn(self, *args, **kwargs)
+        except MYJDTokenInvalidException as e:
+            logger.error("Token still invalid after refresh attempt")
+            raise MyJDOperationError(f"Token invalid even after reconnection: {str(e)}")
+    return wrapper
+
 
 class MyJDClient:
     """MyJDownloader API client wrapper."""
+
+    __slots__ = (
+        'config', 'jd', 'device', '_is_connected', '_api_lock',
+        '_category_paths',
+        '_packages_cache', '_packages_cache_ttl', '_packages_cache_lock',
+        '_packages_cache_generation',
+        '_refresh_lock', '_refresh_generation',
+    )
     
     def __init__(self, config: Config):
         self.config = config
         self.jd = Myjdapi()
         self.device = None
         self._is_connected = False
-        self.logger = logging.getLogger(__name__)
+        # myjdapi keeps a single request id per instance and drops responses
+        # whose rid differs, so calls on self.jd must never overlap
+        self._api_lock = threading.Lock()
+        # Serializes token refreshes; the generation counts successful ones
+        self._refresh_lock = threading.Lock()
+        self._refresh_generation = 0
         
         # Validate configuration
         if not self.config.validate():
             raise ValueError("Invalid configuration. Please check your config.toml file.")
+
+        # Destination folder for each allowed category, resolved once
+        self._category_paths = {
+            category: os.path.join(self.config.base_path, category)
+            for category in self.config.allowed_categories
+        }
+
+        # Short-lived cache of download packages: (monotonic timestamp, packages)
+        self._packages_cache = None
+        self._packages_cache_ttl = 1.0
+        self._packages_cache_lock = threading.Lock()
+        # Bumped on every invalidation so an in-flight fetch cannot store stale data
+        self._packages_cache_generation = 0
     
     def connect(self) -> bool:
         """Connect to MyJDownloader service."""
         try:
-            self.jd.connect(
-                email=self.config.myjd_username,
-                password=self.config.myjd_password
-            )
-            
-            # Get device
-            self.device = self.jd.get_device(self.config.myjd_deviceid)
+            with self._api_lock:
+                self.jd.connect(
+                    email=self.config.myjd_username,
+                    password=self.config.myjd_password
+                )
+                
+                # Get device
+                self.device = self.jd.get_device(self.config.myjd_deviceid)
             
             if not self.device:
                 raise MyJDConnectionError(f"Device with ID {self.config.myjd_deviceid} not found")
             
             self._is_connected = True
-            self.logger.info("Successfully connected to MyJDownloader")
+            logger.info("Successfully connected to MyJDownloader")
             return True
             
         except Exception as e:
-            self.logger.error(f"Failed to connect to MyJDownloader: {str(e)}")
+            logger.error("Failed to connect to MyJDownloader: %s", e)
             raise MyJDConnectionError(f"Connection failed: {str(e)}")
     
     def disconnect(self):
         """Disconnect from MyJDownloader service."""
         try:
             if self.jd:
-                self.jd.disconnect()
+                with self._api_lock:
+                    self.jd.disconnect()
             self._is_connected = False
-            self.logger.info("Disconnected from MyJDownloader")
+            self._invalidate_packages_cache()
+            logger.info("Disconnected from MyJDownloader")
         except Exception as e:
-            self.logger.error(f"Error during disconnection: {str(e)}")
+            logger.error("Error during disconnection: %s", e)
     
     def is_connected(self) -> bool:
         """Check if client is connected."""
         return self._is_connected and self.device is not None
     
-    def _refresh_connection(self) -> bool:
+    def _refresh_connection(self, generation: Optional[int] = None) -> bool:
+        """
+        Refresh the connection token, at most once across concurrent callers.
+        
+        Threads that hit an expired token together wait for the first one to
+        refresh it and then reuse its result instead of reconnecting again.
+        
+        Args:
+            generation: Refresh generation observed before the failing call
+            
+        Returns:
+            bool: True if reconnection was successful, False otherwise.
+        """
+        if generation is None:
+            generation = self._refresh_generation
+        with self._refresh_lock:
+            if generation != self._refresh_generation:
+                logger.info("Token already refreshed by another request")
+                return True
+            refreshed = self._reconnect()
+            if refreshed:
+                self._refresh_generation += 1
+            return refreshed
+    
+    def _reconnect(self) -> bool:
         """
         Refresh the connection token using reconnect.
         
@@ -67,19 +177,20 @@ class MyJDClient:
             bool: True if reconnection was successful, False otherwise.
         """
         try:
-            self.logger.info("Attempting to refresh expired token...")
-            self.jd.reconnect()
-            self.logger.info("Token refreshed successfully")
+            logger.info("Attempting to refresh expired token...")
+            with self._api_lock:
+                self.jd.reconnect()
+            logger.info("Token refreshed successfully")
             return True
         except Exception as e:
-            self.logger.error(f"Failed to refresh token: {str(e)}")
+            logger.error("Failed to refresh token: %s", e)
             # If reconnect fails, try a full reconnect
             try:
-                self.logger.info("Reconnect failed, attempting full connection...")
+                logger.info("Reconnect failed, attempting full connection...")
                 self.connect()
                 return True
             except Exception as connect_error:
-                self.logger.error(f"Full connection also failed: {str(connect_error)}")
+                logger.error("Full connection also failed: %s", connect_error)
                 return False
     
     def add_download_package(
@@ -109,63 +220,54 @@ class MyJDClient:
             if not self.is_connected():
                 self.connect()
         except MyJDConnectionError as e:
-            self.logger.error(f"Cannot add download package, connection error: {str(e)}")
+            logger.error("Cannot add download package, connection error: %s", e)
             result["message"] = f"Connection error: {str(e)}"
             return result
         if not self.is_connected():
-            self.logger.warning("Not connected to MyJDownloader")
+            logger.warning("Not connected to MyJDownloader")
             result["message"] = "Not connected to MyJDownloader"
         elif not download_links:
-            self.logger.warning("No download links provided")
+            logger.warning("No download links provided")
             result["message"] = "No download links provided"
         elif category not in self.config.allowed_categories:
-            self.logger.warning(f"Invalid category provided [{category}]. Cannot request download")
+            logger.warning("Invalid category provided [%s]. Cannot request download", category)
             result["message"] = "Invalid category"
         else:
             try:
-                destination_folder = os.path.join(self.config.base_path, category)
+                # category was checked against allowed_categories above, so it is always mapped
+                destination_folder = self._category_paths[category]
+                # myjdapi serializes the params with json.dumps, so links must stay a str
+                if len(download_links) == 1:
+                    links = download_links[0]
+                else:
+                    links = "\n".join(download_links)
+                # A constant-key dict literal is already built in one opcode; zip/exec templates are slower
                 package = {
                     "packageName": name,
-                    "links": "\n".join(download_links),
+                    "links": links,
                     "destinationFolder": destination_folder,
                     "autostart": "true" if auto_start else "false"
                 }
-                print(f"Adding package: {package}")
-                self._add_links_with_retry(package)
-                self.logger.info(f"Added download package '{name}' with {len(download_links)} links")
+                logger.debug("Adding package: %s", package)
+                self._add_links(package)
+                self._invalidate_packages_cache()
+                logger.info("Added download package '%s' with %d links", name, len(download_links))
                 result["success"] = True
                 result["message"] = f"Package '{name}' added successfully"
             except Exception as e:
-                self.logger.error(f"Failed to add download package: {str(e)}")
+                logger.error("Failed to add download package: %s", e)
                 raise MyJDOperationError(f"Failed to add package: {str(e)}")
         return result
     
-    def _add_links_with_retry(self, package: dict, retry_count: int = 0) -> None:
+    @_with_token_refresh
+    def _add_links(self, package: dict) -> None:
         """
-        Add links to linkgrabber with automatic retry on token expiration.
+        Add links to linkgrabber.
         
         Args:
             package: Package dictionary with links and metadata
-            retry_count: Current retry attempt (used internally)
-            
-        Raises:
-            MyJDOperationError: If the operation fails after retry
         """
-        try:
-            self.device.linkgrabber.add_links([package])
-        except MYJDTokenInvalidException as e:
-            if retry_count == 0:
-                self.logger.warning(f"Token invalid error detected: {str(e)}")
-                if self._refresh_connection():
-                    self.logger.info("Retrying add_links after token refresh...")
-                    self._add_links_with_retry(package, retry_count=1)
-                else:
-                    raise MyJDOperationError("Failed to refresh connection after token expiration")
-            else:
-                self.logger.error("Token still invalid after refresh attempt")
-                raise MyJDOperationError(f"Token invalid even after reconnection: {str(e)}")
-            
-
+        self.device.linkgrabber.add_links([package])
     
     def get_download_packages(self) -> List[DownloadPackage]:
         """
@@ -177,54 +279,70 @@ class MyJDClient:
         if not self.is_connected():
             raise MyJDConnectionError("Not connected to MyJDownloader")
         
+        cached = self._cached_packages()
+        if cached is not None:
+            return cached
+        
+        # Single-flight: one thread queries MyJD, the others wait and reuse its result
+        with self._packages_cache_lock:
+            cached = self._cached_packages()
+            if cached is not None:
+                return cached
+            
+            generation = self._packages_cache_generation
+            fetched_at = time.monotonic()
+            packages = self._fetch_download_packages()
+            # Skip caching if an operation changed the packages during the fetch
+            if generation == self._packages_cache_generation:
+                self._packages_cache = (fetched_at, packages)
+            return packages
+    
+    def _cached_packages(self) -> Optional[List[DownloadPackage]]:
+        """Return the cached download packages if they are still fresh."""
+        cache = self._packages_cache
+        if cache is not None and time.monotonic() - cache[0] < self._packages_cache_ttl:
+            return cache[1]
+        return None
+    
+    def _invalidate_packages_cache(self):
+        """Drop cached download packages after an operation that changes them."""
+        self._packages_cache_generation += 1
+        self._packages_cache = None
+    
+    def _fetch_download_packages(self) -> List[DownloadPackage]:
+        """Query download packages from MyJD and convert them to models."""
         try:
-            packages = self._query_packages_with_retry()
+            packages = self._query_packages()
             
-            download_packages = []
-            for pkg in packages:
-                package = DownloadPackage(
+            # Bind to locals to avoid global lookups on every package
+            package_cls = DownloadPackage
+            status_from_string = DownloadStatus.from_string
+            return [
+                package_cls(
                     name=pkg.get("name", "Unknown"),
                     bytes_total=pkg.get("bytesTotal", 0),
                     bytes_loaded=pkg.get("bytesLoaded", 0),
-                    status=DownloadStatus.from_string(pkg.get("status", "unknown")),
+                    status=status_from_string(pkg.get("status", "unknown")),
                     package_id=pkg.get("uuid", ""),
                     eta=pkg.get("eta", -1),
                     speed=pkg.get("speed", 0)
                 )
-                download_packages.append(package)
-            
-            return download_packages
+                for pkg in packages
+            ]
             
         except Exception as e:
-            self.logger.error(f"Failed to get download packages: {str(e)}")
+            logger.error("Failed to get download packages: %s", e)
             raise MyJDOperationError(f"Failed to get packages: {str(e)}")
     
-    def _query_packages_with_retry(self, retry_count: int = 0) -> List[Dict]:
+    @_with_token_refresh
+    def _query_packages(self) -> List[Dict]:
         """
-        Query download packages with automatic retry on token expiration.
+        Query download packages.
         
-        Args:
-            retry_count: Current retry attempt (used internally)
-            
         Returns:
             List[Dict]: List of package dictionaries
-            
-        Raises:
-            MyJDOperationError: If the operation fails after retry
         """
-        try:
-            return self.device.downloads.query_packages()
-        except MYJDTokenInvalidException as e:
-            if retry_count == 0:
-                self.logger.warning(f"Token invalid error detected in query_packages: {str(e)}")
-                if self._refresh_connection():
-                    self.logger.info("Retrying query_packages after token refresh...")
-                    return self._query_packages_with_retry(retry_count=1)
-                else:
-                    raise MyJDOperationError("Failed to refresh connection after token expiration")
-            else:
-                self.logger.error("Token still invalid after refresh attempt")
-                raise MyJDOperationError(f"Token invalid even after reconnection: {str(e)}")
+        return self.device.downloads.query_packages()
     
     def get_linkgrabber_packages(self) -> List[Dict]:
         """Get packages in linkgrabber (pending downloads)."""
@@ -232,37 +350,20 @@ class MyJDClient:
             raise MyJDConnectionError("Not connected to MyJDownloader")
         
         try:
-            return self._query_linkgrabber_with_retry()
+            return self._query_linkgrabber()
         except Exception as e:
-            self.logger.error(f"Failed to get linkgrabber packages: {str(e)}")
+            logger.error("Failed to get linkgrabber packages: %s", e)
             raise MyJDOperationError(f"Failed to get linkgrabber packages: {str(e)}")
     
-    def _query_linkgrabber_with_retry(self, retry_count: int = 0) -> List[Dict]:
+    @_with_token_refresh
+    def _query_linkgrabber(self) -> List[Dict]:
         """
-        Query linkgrabber packages with automatic retry on token expiration.
+        Query linkgrabber packages.
         
-        Args:
-            retry_count: Current retry attempt (used internally)
-            
         Returns:
             List[Dict]: List of linkgrabber package dictionaries
-            
-        Raises:
-            MyJDOperationError: If the operation fails after retry
         """
-        try:
-            return self.device.linkgrabber.query_packages()
-        except MYJDTokenInvalidException as e:
-            if retry_count == 0:
-                self.logger.warning(f"Token invalid error detected in linkgrabber query: {str(e)}")
-                if self._refresh_connection():
-                    self.logger.info("Retrying linkgrabber query after token refresh...")
-                    return self._query_linkgrabber_with_retry(retry_count=1)
-                else:
-                    raise MyJDOperationError("Failed to refresh connection after token expiration")
-            else:
-                self.logger.error("Token still invalid after refresh attempt")
-                raise MyJDOperationError(f"Token invalid even after reconnection: {str(e)}")
+        return self.device.linkgrabber.query_packages()
     
     def start_downloads(self, package_ids: Optional[List[str]] = None) -> bool:
         """Start downloads for specific packages or all packages."""
@@ -270,43 +371,29 @@ class MyJDClient:
             raise MyJDConnectionError("Not connected to MyJDownloader")
         
         try:
-            self._start_downloads_with_retry(package_ids)
+            self._start_downloads(package_ids)
+            self._invalidate_packages_cache()
             return True
             
         except Exception as e:
-            self.logger.error(f"Failed to start downloads: {str(e)}")
+            logger.error("Failed to start downloads: %s", e)
             raise MyJDOperationError(f"Failed to start downloads: {str(e)}")
     
-    def _start_downloads_with_retry(self, package_ids: Optional[List[str]] = None, retry_count: int = 0) -> None:
+    @_with_token_refresh
+    def _start_downloads(self, package_ids: Optional[List[str]] = None) -> None:
         """
-        Start downloads with automatic retry on token expiration.
+        Start downloads.
         
         Args:
             package_ids: Optional list of package IDs to start
-            retry_count: Current retry attempt (used internally)
-            
-        Raises:
-            MyJDOperationError: If the operation fails after retry
         """
-        try:
-            if package_ids:
-                # Start specific packages (implementation depends on myjdapi capabilities)
-                self.logger.info(f"Starting downloads for packages: {package_ids}")
-            else:
-                # Start all downloads
-                self.device.downloadcontroller.start_downloads()
-                self.logger.info("Started all downloads")
-        except MYJDTokenInvalidException as e:
-            if retry_count == 0:
-                self.logger.warning(f"Token invalid error detected in start_downloads: {str(e)}")
-                if self._refresh_connection():
-                    self.logger.info("Retrying start_downloads after token refresh...")
-                    self._start_downloads_with_retry(package_ids, retry_count=1)
-                else:
-                    raise MyJDOperationError("Failed to refresh connection after token expiration")
-            else:
-                self.logger.error("Token still invalid after refresh attempt")
-                raise MyJDOperationError(f"Token invalid even after reconnection: {str(e)}")
+        if package_ids:
+            # Start specific packages (implementation depends on myjdapi capabilities)
+            logger.info("Starting downloads for packages: %s", package_ids)
+        else:
+            # Start all downloads
+            self.device.downloadcontroller.start_downloads()
+            logger.info("Started all downloads")
     
     def pause_downloads(self, package_ids: Optional[List[str]] = None) -> bool:
         """Pause downloads for specific packages or all packages."""
@@ -314,43 +401,29 @@ class MyJDClient:
             raise MyJDConnectionError("Not connected to MyJDownloader")
         
         try:
-            self._pause_downloads_with_retry(package_ids)
+            self._pause_downloads(package_ids)
+            self._invalidate_packages_cache()
             return True
             
         except Exception as e:
-            self.logger.error(f"Failed to pause downloads: {str(e)}")
+            logger.error("Failed to pause downloads: %s", e)
             raise MyJDOperationError(f"Failed to pause downloads: {str(e)}")
     
-    def _pause_downloads_with_retry(self, package_ids: Optional[List[str]] = None, retry_count: int = 0) -> None:
+    @_with_token_refresh
+    def _pause_downloads(self, package_ids: Optional[List[str]] = None) -> None:
         """
-        Pause downloads with automatic retry on token expiration.
+        Pause downloads.
         
         Args:
             package_ids: Optional list of package IDs to pause
-            retry_count: Current retry attempt (used internally)
-            
-        Raises:
-            MyJDOperationError: If the operation fails after retry
         """
-        try:
-            if package_ids:
-                # Pause specific packages
-                self.logger.info(f"Pausing downloads for packages: {package_ids}")
-            else:
-                # Pause all downloads
-                self.device.downloadcontroller.pause_downloads()
-                self.logger.info("Paused all downloads")
-        except MYJDTokenInvalidException as e:
-            if retry_count == 0:
-                self.logger.warning(f"Token invalid error detected in pause_downloads: {str(e)}")
-                if self._refresh_connection():
-                    self.logger.info("Retrying pause_downloads after token refresh...")
-                    self._pause_downloads_with_retry(package_ids, retry_count=1)
-                else:
-                    raise MyJDOperationError("Failed to refresh connection after token expiration")
-            else:
-                self.logger.error("Token still invalid after refresh attempt")
-                raise MyJDOperationError(f"Token invalid even after reconnection: {str(e)}")
+        if package_ids:
+            # Pause specific packages
+            logger.info("Pausing downloads for packages: %s", package_ids)
+        else:
+            # Pause all downloads
+            self.device.downloadcontroller.pause_downloads()
+            logger.info("Paused all downloads")
     
     def __enter__(self):
         """Context manager entry."""
@@ -1,6 +1,11 @@
 from enum import Enum
 from dataclasses import dataclass
+from typing import AbstractSet, ClassVar
 import logging
+
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+
 class DownloadStatus(Enum):
     """Download status enumeration."""
     UNKNOWN = "unknown"
@@ -14,18 +19,17 @@ class DownloadStatus(Enum):
     @classmethod
     def from_string(cls, status_str: str) -> 'DownloadStatus':
         """Convert string status to enum."""
-        status_map = {
-            "downloading": cls.DOWNLOADING,
-            "finished": cls.FINISHED,
-            "failed": cls.FAILED,
-            "paused": cls.PAUSED,
-            "pending": cls.PENDING,
-            "extracting": cls.EXTRACTING,
-        }
-        return status_map.get(status_str.lower(), cls.UNKNOWN)
+        # MyJD usually sends lowercase statuses, so try the raw value first
+        status = _STATUS_BY_VALUE.get(status_str)
+        if status is None:
+            status = _STATUS_BY_VALUE.get(status_str.lower(), cls.UNKNOWN)
+        return status
 
 
-@dataclass
+_STATUS_BY_VALUE = {status.value: status for status in DownloadStatus}
+
+
+@dataclass(slots=True)
 class DownloadPackage:
     """Represents a download package."""
     name: str
@@ -76,43 +80,45 @@ class DownloadPackage:
         if bytes_value == 0:
             return "0 B"
         
-        sizes = ["B", "KB", "MB", "GB", "TB"]
-        i = 0
-        while bytes_value >= 1024 and i < len(sizes) - 1:
-            bytes_value /= 1024.0
-            i += 1
-        
-        return f"{bytes_value:.1f} {sizes[i]}"
+        # Each unit is 2**10 times the previous one, so the bit length gives the unit index
+        i = min((max(int(bytes_value), 1).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+        return f"{bytes_value / (1 << (10 * i)):.1f} {_SIZE_UNITS[i]}"
     
     def to_dict(self) -> dict:
         """Convert to dictionary representation."""
+        # Inlined equivalent of the properties above, reading each field only once
+        format_bytes = self._format_bytes
+        bytes_total = self.bytes_total
+        bytes_loaded = self.bytes_loaded
+        speed = self.speed
+        status = self.status
         return {
             "name": self.name,
             "package_id": self.package_id,
-            "status": self.status.value,
-            "progress_percentage": self.progress_percentage,
-            "bytes_total": self.bytes_total,
-            "bytes_loaded": self.bytes_loaded,
-            "formatted_size": self.formatted_size,
-            "formatted_downloaded": self.formatted_downloaded,
-            "speed": self.speed,
-            "formatted_speed": self.formatted_speed,
+            "status": status.value,
+            "progress_percentage": 0.0 if bytes_total == 0 else (bytes_loaded / bytes_total) * 100,
+            "bytes_total": bytes_total,
+            "bytes_loaded": bytes_loaded,
+            "formatted_size": format_bytes(bytes_total),
+            "formatted_downloaded": format_bytes(bytes_loaded),
+            "speed": speed,
+            "formatted_speed": "0 B/s" if speed == 0 else f"{format_bytes(speed)}/s",
             "eta": self.eta,
-            "is_completed": self.is_completed,
-            "is_downloading": self.is_downloading
+            "is_completed": status is DownloadStatus.FINISHED,
+            "is_downloading": status is DownloadStatus.DOWNLOADING
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class DownloadRequest:
     """Represents a download request."""
     name: str
     links: list
     category: str = "other"
     auto_start: bool = True
-    logger = logging.getLogger("DownloadRequestValidator")
+    logger: ClassVar[logging.Logger] = logging.getLogger("DownloadRequestValidator")
     
-    def validate(self, allowed_categories: list) -> bool:
+    def validate(self, allowed_categories: AbstractSet[str]) -> bool:
         """Validate the download request."""
         if not self.name.strip():
             self.logger.warning("Download name is empty.")
@@ -6,8 +6,10 @@ Main entry point for the Flask application.
 
 import os
 import sys
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from app import create_app
 from app.core.config_manager import Config
 from app.utils.exceptions import MyJDConnectionError, ConfigurationError
@@ -35,7 +37,14 @@ def setup_logging(created_app, log_dir='/logs'):
             '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
         ))
         file_handler.setLevel(logging.INFO)
-        created_app.logger.addHandler(file_handler)
+
+        # Request threads only enqueue records; a background listener writes them to disk
+        log_queue = queue.Queue(-1)
+        listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+
+        created_app.logger.addHandler(QueueHandler(log_queue))
         created_app.logger.setLevel(logging.INFO)
         created_app.logger.info('MyJDownloader API startup')
 
@@ -100,6 +109,7 @@ def index():
             'start_downloads': '/api/downloads/start',
             'pause_downloads': '/api/downloads/pause',
             'linkgrabber': '/api/linkgrabber',
+            'overview': '/api/overview',
             'config': '/api/config'
         },
         'documentation': {
@@ -128,12 +138,6 @@ def index():
     }
 
 
-@app.teardown_appcontext
-def cleanup(error):
-    """Cleanup resources on app context teardown."""
-    if error:
-        app.logger.error(f'App context teardown with error: {str(error)}')
-
 def run_development_server():
     """Run the development server."""
     print("=" * 50)
@@ -151,23 +155,25 @@ def run_development_server():
         threaded=True
     )
 
-def run_production_server():
+def run_production_server(host='0.0.0.0', port=8080):
     """Run the production server using Waitress."""
     try:
         from waitress import serve
 
+        threads = app.my_config.server_threads
+
         print("=" * 50)
         print("MyJDownloader API - Production Server")
         print("=" * 50)
-        print(f"Server starting on http://localhost:8080")
-        print(f"API endpoints available at http://localhost:8080/api/")
+        print(f"Server starting on http://{host}:{port} with {threads} threads")
+        print(f"API endpoints available at http://{host}:{port}/api/")
         print("=" * 50)
 
         serve(
             app,
-            host='0.0.0.0',
-            port=8080,
-            threads=4,
+            host=host,
+            port=port,
+            threads=threads,
             max_request_body_size=1073741824,  # 1GB
             cleanup_interval=30,
             channel_timeout=120
@@ -178,7 +184,6 @@ def run_production_server():
         print("Falling back to development server...")
         run_development_server()
 
-
 if __name__ == '__main__':
     import argparse
 
@@ -207,10 +212,7 @@ if __name__ == '__main__':
     if args.mode == 'production':
         if args.port:
             # Override default production port
-            from waitress import serve
-
-            print(f"Starting production server on {args.host}:{args.port}")
-            serve(app, host=args.host, port=args.port, threads=4)
+            run_production_server(host=args.host, port=args.port)
         else:
             run_production_server()
     else: